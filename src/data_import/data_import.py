@@ -1,19 +1,64 @@
 """The main module handling the scrapping the data."""
+# Usage (from repo's main folder):
+# python src\data_import\data_import.py {companies,prices,eco,merge,all,status,serve}
+# Heavy packages (pandas, bs4, requests...) are imported inside subcommands,
+# so quick subcommands (status, merge) do not load scrapping dependencies.
+# pylint: disable=import-outside-toplevel
 
+import argparse
 from datetime import datetime as dt
 import glob
 import os
-from func.importer import company_importer as cimp
-from func.importer import tab_finder as tfin
-from func.importer import CompanyDF
-from func.importer import EcoDF
-from func.importer import FinalDF
-import pandas as pd
-from requests.exceptions import ConnectionError as ce
-
-def main_import():
+import sys
+
+# Data files of each stage: folder, file prefix and extension
+# File name is prefix + version + extension, version is date in dd_mm_yyyy format
+DATA_FILES = {
+    'companies':('data\\companies\\', 'companies_data_', '.csv'),
+    'prices':('data\\prices\\', 'prices_', '.npz'),
+    'eco':('data\\eco\\', 'economic_data_', '.csv'),
+    'dataset':('data\\full_datasets\\', 'dataset_', '.csv'),
+    'peers':('data\\peers\\', 'peer_index_', '.pkl')
+}
+
+def data_file(kind, version=None, required=True):
+    """Function returning path of data file of given kind and version."""
+    # Without version the newest file is returned
+    # If file is missing and it is not required, None is returned
+
+    folder, prefix, extension = DATA_FILES[kind]
+
+    if version:
+        path = folder + prefix + version + extension
+        files = [path] if os.path.exists(path) else []
+    else:
+        files = glob.glob(folder + '*' + extension)
+
+    if not files:
+        if required:
+            raise FileNotFoundError(
+                f'No {kind} file' + (f' in version {version}' if version else '') + ' found!'
+            )
+        return None
+
+    return max(files, key = os.path.getctime)
+
+def output_file(kind, version=None):
+    """Function returning path of output file of given kind."""
+    # Default version is today's date
+
+    folder, prefix, extension = DATA_FILES[kind]
+
+    return folder + prefix + (version or dt.now().strftime('%d_%m_%Y')) + extension
+
+def main_import(output_version=None):
     """Import of main data - financial reports of WSE companies."""
 
+    from func.governor import governor
+    from func.importer import company_importer as cimp
+    from func.importer import CompanyDF
+    import pandas as pd
+
     url_main = 'https://www.biznesradar.pl/gielda/akcje_gpw'
 
     # Importing list of companies
@@ -26,12 +71,16 @@ def main_import():
     all_companies_df = pd.DataFrame()
 
     # Importing data of companies
+    # Companies are imported in parallel, governor keeps requests under website's limits
+
+    finished = []
+
+    def company_import(code):
+        """Subfunction importing data of single company."""
 
-    code_iter = 0
-    for code in comp_dict:
-        code_iter += 1
         # Initialization of company data frame
         importer = CompanyDF(code, features_dict)
+        company_df = pd.DataFrame()
 
         # List of urls
         url_list = [
@@ -62,7 +111,13 @@ def main_import():
 
             company_df = importer.dividend_importer(url_list[-1], company_df)
 
-        # Adding company's dataframe to final dataframe
+        finished.append(code)
+        print(f'Importing {code} is finished! ({int(100 * len(finished) / len(comp_dict))}%)')
+
+        return company_df
+
+    # Adding companies' dataframes to final dataframe
+    for company_df in governor.map(company_import, comp_dict):
         if not company_df.empty:
             if all_companies_df.empty:
                 all_companies_df = company_df.reset_index(drop=True)
@@ -71,29 +126,60 @@ def main_import():
                     [all_companies_df, company_df.reset_index(drop=True)]
                 )
 
-        print(f'Importing {code} is finished! ({int(100 * code_iter / len(comp_dict))}%)')
-
-    all_companies_df.to_csv(
-        'data\\companies\\companies_data_' + dt.now().strftime('%d_%m_%Y') +'.csv'
-    )
+    all_companies_df.to_csv(output_file('companies', output_version))
 
     print('Gathering data is finished!')
 
-def eco_import():
+def price_import(output_version=None):
+    """Additional importer - daily prices of WSE companies."""
+
+    from func.governor import governor
+    from func.importer import company_importer as cimp
+    from func.importer import price_importer as pimp
+    from func.prices import PriceStore
+
+    url_main = 'https://www.biznesradar.pl/gielda/akcje_gpw'
+
+    # Importing list of companies
+    comp_dict = cimp(url_main)
+
+    store = PriceStore()
+
+    finished = []
+
+    def company_prices(code):
+        """Subfunction importing daily prices of single company."""
+
+        cells = pimp(code)
+        store.add(
+            code, cells['date'], cells['open'], cells['high'], cells['low'], cells['close']
+        )
+
+        finished.append(code)
+        print(
+            f'Importing {code} prices is finished! ({int(100 * len(finished) / len(comp_dict))}%)'
+        )
+
+    governor.map(company_prices, comp_dict)
+
+    store.save(output_file('prices', output_version))
+
+    print('Gathering prices is finished!')
+
+def eco_import(input_version=None, output_version=None):
     """Additional importer - economic data."""
 
+    from func.importer import tab_finder as tfin
+    from func.importer import EcoDF
+    import pandas as pd
+
     # Loading of variables dict
     features_df = pd.read_csv('data\\features_dict.csv', header=0)
     features_dict = dict(zip(features_df['PL'], features_df['Variable']))
 
     # Accessing companies' data file to gather quarters
     quarters = sorted(
-        pd.read_csv(
-            max(
-                glob.glob('data\\companies\\*.csv'),
-                key = os.path.getctime
-            )
-        )['quarter'].unique()
+        pd.read_csv(data_file('companies', input_version))['quarter'].unique()
     )
 
     # Initialization of sub urls dict
@@ -138,54 +224,168 @@ def eco_import():
     )
     print('Gathering indices data is finished!')
 
-    eco_df.to_csv(
-        'data\\eco\\economic_data_' + dt.now().strftime('%d_%m_%Y') +'.csv'
-    )
+    eco_df.to_csv(output_file('eco', output_version))
 
     print('Gathering data is finished!')
 
-def final_merge():
+def final_merge(input_version=None, output_version=None):
     """Merge of companies and economic data"""
     # Plus other additions
 
+    import pickle
+    from func.final import FinalDF
+    from func.peers import PeerIndex
+    from func.prices import PriceStore
+    import pandas as pd
+
     merger = FinalDF(
-        # Accessing companies' data file to gather quarters
-        pd.read_csv(
-            max(
-                glob.glob('data\\companies\\*.csv'),
-                key = os.path.getctime
-            ),
-            index_col=0
-        ),
-        # Accessing economic data file to gather quarters
-        pd.read_csv(
-            max(
-                glob.glob('data\\eco\\*.csv'),
-                key = os.path.getctime
-            ),
-            index_col=0
-        )
+        # Accessing companies' data file
+        pd.read_csv(data_file('companies', input_version), index_col=0),
+        # Accessing economic data file
+        pd.read_csv(data_file('eco', input_version), index_col=0)
     )
 
     final_df = merger.merger()
+
+    # Daily prices are optional - they add targets based on intra-quarter prices
+    prices_path = data_file('prices', input_version, required=False)
+    if prices_path:
+        final_df = merger.price_merger(
+            final_df, PriceStore.load(prices_path).quarterly_all()
+        )
+
     final_df = merger.guru_features(final_df)
 
-    final_df.to_csv(
-        'data\\full_datasets\\dataset_' + dt.now().strftime('%d_%m_%Y') +'.csv',
-        index=False
-    )
+    # Peer indexes are cached between runs, so only changed companies are searched again
+    # Cache is optional - if it could not be read, indexes are built from scratch
+    peer_index = PeerIndex()
+    peer_path = data_file('peers', required=False)
+    if peer_path:
+        try:
+            peer_index.load(peer_path)
+        except (OSError, EOFError, pickle.UnpicklingError) as error:
+            print(f'Peer indexes cache could not be loaded ({error}).')
+    final_df = merger.peer_features(final_df, peer_index)
+
+    final_df.to_csv(output_file('dataset', output_version), index=False)
+
+    try:
+        os.makedirs(DATA_FILES['peers'][0], exist_ok=True)
+        peer_index.save(output_file('peers', output_version))
+    except OSError as error:
+        print(f'Peer indexes cache could not be saved ({error}).')
 
     print('The final file is ready!')
 
 
-# Run the import
-try:
-    main_import()
-    eco_import()
-    final_merge()
-except ce:
-    print('Failed to connect to the website.')
-    print('Check your internet connection and website availability.')
-    print('Main website is https://www.biznesradar.pl')
-finally:
-    print('The procedure has ended.')
+def scrape(stages):
+    """Function running scrapping stages with handling of connection errors."""
+    # Returns exit code: 0 if all stages succeeded, 1 otherwise
+
+    from requests.exceptions import RequestException
+
+    try:
+        for stage in stages:
+            stage()
+    except RequestException as error:
+        # Connection errors and error responses left after all retries of the governor
+        print(f'Failed to connect to the website ({error}).')
+        print('Check your internet connection and website availability.')
+        print('Main website is https://www.biznesradar.pl')
+        return 1
+    finally:
+        print('The procedure has ended.')
+
+    return 0
+
+def status():
+    """Function printing the newest data file of each stage."""
+
+    for kind in DATA_FILES:
+        path = data_file(kind, required=False)
+        if path:
+            modified = dt.fromtimestamp(os.path.getmtime(path)).strftime('%d.%m.%Y %H:%M')
+            print(f'{kind}: {path} (modified {modified})')
+        else:
+            print(f'{kind}: no file')
+
+def serve(host, port):
+    """Function running query service over the newest full dataset."""
+
+    from func.query import DatasetQuery
+    from func.query import serve as query_serve
+
+    query_serve(DatasetQuery(DATA_FILES['dataset'][0] + '*.csv'), host, port)
+
+def main(argv=None):
+    """Function parsing command line and running chosen subcommand."""
+    # Returns exit code, non-zero if subcommand failed (e.g. for cron)
+
+    parser = argparse.ArgumentParser(
+        description='Scrapping and merging data of Warsaw Stock Exchange companies.'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    # Subcommands with their options
+    # input - subcommand reads files of given version (default: the newest ones)
+    # output - subcommand writes files of given version (default: today's date)
+    commands = {
+        'companies':('import financial reports of companies', False, True),
+        'prices':('import daily prices of companies', False, True),
+        'eco':('import economic data', True, True),
+        'merge':('merge companies and economic data into full dataset', True, True),
+        'all':('run companies, prices, eco and merge', False, True),
+        'status':('show the newest data file of each stage', False, False),
+        'serve':('run query service over the newest full dataset', False, False)
+    }
+    for command, (help_text, has_input, has_output) in commands.items():
+        subparser = subparsers.add_parser(command, help=help_text)
+        if has_input:
+            subparser.add_argument(
+                '--input-version', metavar='DD_MM_YYYY',
+                help='version of input files (default: the newest)'
+            )
+        if has_output:
+            subparser.add_argument(
+                '--output-version', metavar='DD_MM_YYYY',
+                help='version of output files (default: today)'
+            )
+        if command == 'serve':
+            subparser.add_argument('--host', default='127.0.0.1')
+            subparser.add_argument('--port', type=int, default=8000)
+
+    args = parser.parse_args(argv)
+
+    # Missing input files are reported without traceback
+    exit_code = 0
+    try:
+        if args.command == 'companies':
+            exit_code = scrape([lambda: main_import(args.output_version)])
+        elif args.command == 'prices':
+            exit_code = scrape([lambda: price_import(args.output_version)])
+        elif args.command == 'eco':
+            exit_code = scrape([lambda: eco_import(args.input_version, args.output_version)])
+        elif args.command == 'merge':
+            final_merge(args.input_version, args.output_version)
+        elif args.command == 'all':
+            # Whole run uses one version, so each stage reads files written by previous ones
+            version = args.output_version or dt.now().strftime('%d_%m_%Y')
+            exit_code = scrape([
+                lambda: main_import(version),
+                lambda: price_import(version),
+                lambda: eco_import(version, version),
+                lambda: final_merge(version, version)
+            ])
+        elif args.command == 'status':
+            status()
+        elif args.command == 'serve':
+            serve(args.host, args.port)
+    except FileNotFoundError as error:
+        print(error)
+        exit_code = 1
+
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""The module merging companies' and economic data."""
+
+import math
+import numpy as np
+import pandas as pd
+from func.peers import PeerIndex
+
+class FinalDF():
+    """Final data frame"""
+    # These data frame contains companies and economic data
+    # plus other additions for guru strategies
+
+    def __init__(self, companies_df, eco_df):
+        self.companies_df = companies_df
+        self.eco_df = eco_df
+
+    def merger(self):
+        """Function merging companies' and economic dfs"""
+
+        # Merging dfs
+        final_df = pd.merge(
+            self.companies_df,
+            self.eco_df,
+            left_on='quarter',
+            right_index=True
+        )
+
+        return final_df
+
+    def price_merger(self, data_frame, prices_df):
+        """Function adding price targets based on daily prices"""
+        # prices_df is output of PriceStore.quarterly_all()
+        # Daily based max price change includes intra-quarter highs, so it has different
+        # meaning than max_price_change_y (based on quarter-end prices).
+        # Hence it is kept in its own column: max_price_change_y_daily
+
+        prices_df = prices_df.rename(
+            columns={'max_price_change_y':'max_price_change_y_daily'}
+        )
+
+        return pd.merge(
+            data_frame, prices_df, how='left', on=['quarter', 'company_code']
+        )
+
+    def guru_features(self, data_frame):
+        """Function adding various features for guru strategies"""
+
+        # Dictionary of variables to divide
+        # Key is new variable name
+        # Value is list: [dividend, divisor]
+        div_dict = {
+            'capitalization_usd':['capitalization', 'usd_pln'],
+            'relative_strength_6m':['price_change_6m', 'wig_6m'],
+            'price_earnings_net_earnings':['price_earnings', 'net_earnings'],
+            'roce':['ebit', 'core_capital'],
+            'net_debt_ebit':['net_debt', 'ebit'],
+            'current_assets_short_term_liabilities':['current_assets', 'short_term_liabilities'],
+            'long_term_liabilities_net_working_capital':[
+                'long_term_liabilities', 'net_working_capital'
+            ]
+        }
+
+        # Ranking variables
+        # Key is new variable name
+        # Value is variable on which the ranking is based
+
+        # Ascending rank dict:
+        asc_dict = {
+            'rank_ev_ebit':'ev_ebit',
+            'rank_price_sales_revenues':'price_sales_revenues',
+            'rank_price_earnings':'price_earnings'
+        }
+
+        # Descending rank dict:
+        desc_dict = {
+            'rank_roic':'roic',
+            'rank_relative_strength_6m':'relative_strength_6m',
+            'rank_ebit_yy':'ebit_yy'
+        }
+
+        # Capitalization
+        data_frame['capitalization'] = data_frame.apply(
+            lambda row: row.number_of_shares * row.price,
+            axis=1
+        )
+
+        # Division of various features
+        for key, value in div_dict.items():
+            dividend_index = data_frame.columns.get_loc(value[0])
+            divisor_index = data_frame.columns.get_loc(value[1])
+            division = []
+
+            # Yes, I know it's anti-pattern - but it's needed for proper division
+            for index, _ in data_frame.iterrows():
+                dividend = data_frame.iloc[index, dividend_index]
+                divisor = data_frame.iloc[index, divisor_index]
+                if not np.isnan(dividend):
+                    if divisor == 0 and dividend != 0:
+                        division.append(
+                            dividend / 10 ** -(int(math.log10(abs(dividend))) + 1)
+                        )
+                    if divisor == 0 and dividend == 0:
+                        division.append(0)
+                    division.append(dividend / divisor)
+                division.append(math.nan)
+
+            data_frame[key] = pd.Series(division)
+
+        # Ascending rankings
+        for key, value in asc_dict.items():
+            data_frame[key] = data_frame.groupby('quarter')[value].rank(method='dense')
+
+        # Descending rankings
+        for key, value in desc_dict.items():
+            data_frame[key] = data_frame.groupby('quarter')[value].rank(
+                method='dense',
+                ascending=False
+            )
+
+        # Greenblatt's ranking
+        data_frame['greenblatt_rank'] = data_frame.apply(
+            lambda row: (row.rank_ev_ebit + row.rank_roic) / 2,
+            axis=1
+        )
+        data_frame['greenblatt_rank'] = data_frame.groupby('quarter')['greenblatt_rank'].rank(
+            method='dense',
+            ascending=False
+        )
+
+        # Average P/E ratio
+        avg_price_earnings = pd.DataFrame(data_frame.groupby('quarter')['price_earnings'].mean())
+        avg_price_earnings = avg_price_earnings.rename(
+            columns={'price_earnings':'avg_price_earnings'}
+        )
+
+        data_frame = pd.merge(data_frame, avg_price_earnings, left_on='quarter', right_index=True)
+
+        return data_frame
+
+    def peer_features(self, data_frame, peer_index=None):
+        """Function adding features relative to peer group of each company"""
+        # Peers are nearest companies in the same quarter by standardized fundamentals,
+        # see func.peers for lists of variables used
+        # peer_index with cached indexes could be passed to update them incrementally
+
+        if peer_index is None:
+            peer_index = PeerIndex()
+
+        return peer_index.peer_features(data_frame)
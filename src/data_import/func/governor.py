@@ -0,0 +1,159 @@
+"""The module governing HTTP requests sent to the website."""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+import requests
+import requests.adapters
+
+class RequestGovernor():
+    """Rate limiter and concurrency controller shared by all HTTP calls"""
+    # Token bucket keeps requests per second under rate (with bursts up to burst).
+    # Concurrency limit is adjusted with AIMD (additive increase, multiplicative decrease):
+    # - every fast successful response increases limit by increase / limit,
+    # - slow response (latency above target_latency), 429 or 5xx multiplies limit by decrease.
+    # 429/5xx responses and connection errors are retried with jittered exponential backoff,
+    # Retry-After header is honoured (it also pauses all other requests).
+
+    def __init__(
+        self, rate=5.0, burst=5, max_concurrency=16, target_latency=2.0,
+        max_retries=5, backoff=1.0, max_backoff=60.0
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.increase = 1.0
+        self.decrease = 0.5
+
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self.paused_until = 0.0
+        self.limit = 1.0
+        self.active = 0
+        self.condition = threading.Condition()
+        # Connection pool as big as maximal concurrency, so connections are reused
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=max_concurrency, pool_maxsize=max_concurrency
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def acquire(self):
+        """Function waiting for free concurrency slot and rate token."""
+
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.burst, self.tokens + (now - self.last_refill) * self.rate
+                )
+                self.last_refill = now
+
+                if self.active < int(self.limit) and now >= self.paused_until:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        self.active += 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                elif now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    # Waiting for release() of another request
+                    wait = None
+
+                self.condition.wait(wait)
+
+    def release(self, latency=None, overloaded=False):
+        """Function freeing concurrency slot and adjusting the limit."""
+
+        with self.condition:
+            self.active -= 1
+            if overloaded or (latency is not None and latency > self.target_latency):
+                self.limit = max(1.0, self.limit * self.decrease)
+            elif latency is not None:
+                self.limit = min(self.max_concurrency, self.limit + self.increase / self.limit)
+            self.condition.notify_all()
+
+    def pause(self, seconds):
+        """Function pausing all requests for given number of seconds."""
+
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.condition.notify_all()
+
+    def delay(self, attempt, response=None):
+        """Function calculating delay before next attempt."""
+        # Retry-After could be number of seconds or HTTP date
+
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return min(self.max_backoff, max(0.0, float(retry_after)))
+            except ValueError:
+                try:
+                    return min(
+                        self.max_backoff,
+                        max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                    )
+                except (TypeError, ValueError):
+                    pass
+
+        # Full jitter: random delay between 0 and exponential backoff
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def get(self, url, **kwargs):
+        """Function sending GET request under rate and concurrency limits."""
+        # Responses other than 429/5xx (e.g. 404) are returned without retrying.
+        # After max_retries the last error is raised (HTTPError for 429/5xx responses),
+        # so error page is never taken for a page without table.
+
+        attempt = 0
+        while True:
+            self.acquire()
+            start = time.monotonic()
+            error, latency, overloaded = None, None, True
+            try:
+                response = self.session.get(url, **kwargs)
+                latency = time.monotonic() - start
+                overloaded = response.status_code == 429 or response.status_code >= 500
+            except (requests.ConnectionError, requests.Timeout) as request_error:
+                error = request_error
+            finally:
+                # Slot is released after any error, other errors are raised further
+                self.release(latency, overloaded)
+
+            if error is not None:
+                if attempt >= self.max_retries:
+                    raise error
+                time.sleep(self.delay(attempt))
+                attempt += 1
+                continue
+
+            if not overloaded:
+                return response
+            if attempt >= self.max_retries:
+                response.raise_for_status()
+
+            wait = self.delay(attempt, response)
+            if response.status_code == 429:
+                self.pause(wait)
+            time.sleep(wait)
+            attempt += 1
+
+    def map(self, function, items):
+        """Function running function for all items in parallel."""
+        # Number of threads is max_concurrency,
+        # actual number of parallel requests is controlled by the governor.
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            return list(executor.map(function, items))
+
+# Governor shared by all importers
+governor = RequestGovernor()
@@ -7,14 +7,15 @@ from bs4 import BeautifulSoup as bs
 import numpy as np
 import pandas as pd
 from progress.bar import PixelBar as pb
-import requests
+from func.governor import governor
+from func.resampler import resample_quarterly
 
 def company_importer(url):
     """The function importing dictionary of companies' codes from url."""
 
     # Cooking the soup...
     tab = bs(
-        requests.get(
+        governor.get(
             url,
             timeout = 100
         ).text,
@@ -33,26 +34,6 @@ def company_importer(url):
 
     return comp_dict
 
-def date_converter(date):
-    """Subfunction converting date."""
-    # Input format: dd.mm.yyyy
-    # Output format: yyyy/QQ
-    # If date is not quarter date (i.e. March/June/September/December)
-    # function would return 'invalid_date' to prevent passing data from this period
-
-    # Dict of dates
-    date_dict = {
-        '03':'Q1',
-        '06':'Q2',
-        '09':'Q3',
-        '12':'Q4'
-    }
-
-    if date[3:5] in date_dict:
-        return date[6:] + '/' + date_dict[date[3:5]]
-
-    return 'invalid_date'
-
 def dynamics(newer_val, older_val):
     """Function to handle dynamics calculation"""
     # E.g. newer_val is value for Q1/2020,
@@ -75,10 +56,39 @@ def tab_finder(url, section_type, class_type):
     # Output is table found in website
 
     return bs(
-        requests.get(url, timeout = 100).content,
+        governor.get(url, timeout = 100).content,
         'lxml'
     ).find(section_type, {'class':class_type})
 
+def price_importer(code):
+    """Function importing daily OHLC prices of company."""
+    # Input is company code, data is gathered from historical quotes pages.
+    # Output is dict: list of dates (dd.mm.yyyy) and arrays of open/high/low/close prices.
+    # Table columns are: date, open, max, min, close, volume, turnover
+
+    url = 'https://www.biznesradar.pl/notowania-historyczne/' + code
+    cells = {'date':[], 'open':[], 'high':[], 'low':[], 'close':[]}
+
+    page = 1
+    tab = tab_finder(url + ',' + str(page), 'table', 'qTableFull')
+    while tab:
+        for row in tab.find_all('tr')[1:]:
+            row_cells = row.find_all('td')
+            if len(row_cells) >= 5:
+                for key, cell in zip(cells, row_cells):
+                    cells[key].append(cell.text.strip())
+        page += 1
+        tab = tab_finder(url + ',' + str(page), 'table', 'qTableFull')
+
+    # Conversion of all prices at once
+    for key in ['open', 'high', 'low', 'close']:
+        cells[key] = pd.to_numeric(
+            pd.Series(cells[key], dtype=object).str.replace(' ', ''),
+            errors='coerce'
+        ).to_numpy()
+
+    return cells
+
 def quarters_changer(start, steps):
     """Function to look for quarter n steps back/forward"""
     # I.e. for start = '2020/Q1' and steps = 2 it would return '2020/Q3'
@@ -370,33 +380,35 @@ class CompanyDF():
 class EcoDF():
     """Data frame with economic data"""
 
-    def __init__(self, features_dict):
+    def __init__(self, features_dict, rules=None):
         self.features_dict = features_dict
+        # Aggregation rules of series, e.g. {'inflation_mm_m': ('last', 'mean', 'max')}
+        # Series not present in dict use default rules (see func.resampler)
+        self.rules = rules or {}
 
     def eco_importer(self, url, row_name):
         """Function handling economic data from biznesradar.pl"""
         # Input is URL for various tables with economic data
         # row_name indicates feature gained from table
+        # All observations are gathered first and then aggregated to quarters at once
 
         # Initialization of data lists
-        quarters, data = [], []
+        dates, data = [], []
 
         # Gathering data from sub url
         page = 1
         tab = tab_finder(url + ',' + str(page), 'table', 'qTableFull')
         while tab:
             for row in tab.find_all('tr')[1:]:
-                date_str = date_converter(row.find_all('td')[0].text)
-                if date_str != 'invalid_date':
-                    quarters.append(date_str)
-                    data.append(leval(row.find_all('td')[1].text))
+                cells = row.find_all('td')
+                dates.append(cells[0].text)
+                data.append(cells[1].text)
             page += 1
             tab = tab_finder(url + ',' + str(page), 'table', 'qTableFull')
 
-        temp_df = pd.DataFrame(data, index=quarters)
-        temp_df.columns = [self.features_dict[row_name]]
+        name = self.features_dict[row_name]
 
-        return temp_df
+        return resample_quarterly(dates, data, name, self.rules.get(name))
 
     def indices_importer(self, quarters):
         """Function handling WIG and USD/PLN data"""
@@ -408,30 +420,24 @@ class EcoDF():
 
             print(f'Importing {row_name}...')
             # Initialization of data lists
-            quarters, data = [], []
+            dates, data = [], []
 
             # Gathering data from sub url
+            # USD/PLN table has exchange rate in 2nd column, WIG table has close in 5th column
+            column = 1 if row_name == 'usd_pln' else 4
             page = 1
             tab = tab_finder(url + ',' + str(page), 'table', 'qTableFull')
-            prev_month, current_month = '', ''
             while tab:
                 print(f'page {page}...')
                 for row in tab.find_all('tr')[1:]:
-                    current_month = row.find_all('td')[0].text[3:5]
-                    current_date = date_converter(row.find_all('td')[0].text)
-                    if current_month != prev_month and current_date != 'invalid_date':
-                        date_str = current_date
-                        quarters.append(date_str)
-                        if row_name == 'usd_pln':
-                            data.append(leval(row.find_all('td')[1].text))
-                        else:
-                            data.append(leval(row.find_all('td')[4].text))
-                    prev_month = current_month
+                    cells = row.find_all('td')
+                    dates.append(cells[0].text)
+                    data.append(cells[column].text)
                 page += 1
                 tab = tab_finder(url + ',' + str(page), 'table', 'qTableFull')
 
-            temp_df = pd.DataFrame(data, index=quarters)
-            temp_df.columns = [row_name]
+            # Daily data is aggregated to quarters at once
+            temp_df = resample_quarterly(dates, data, row_name, self.rules.get(row_name))
 
             print(f'Importing {row_name} is finished!')
 
@@ -484,120 +490,3 @@ class EcoDF():
             )
 
         return indices_df
-
-class FinalDF():
-    """Final data frame"""
-    # These data frame contains companies and economic data
-    # plus other additions for guru strategies
-
-    def __init__(self, companies_df, eco_df):
-        self.companies_df = companies_df
-        self.eco_df = eco_df
-
-    def merger(self):
-        """Function merging companies' and economic dfs"""
-
-        # Merging dfs
-        final_df = pd.merge(
-            self.companies_df,
-            self.eco_df,
-            left_on='quarter',
-            right_index=True
-        )
-
-        return final_df
-
-    def guru_features(self, data_frame):
-        """Function adding various features for guru strategies"""
-
-        # Dictionary of variables to divide
-        # Key is new variable name
-        # Value is list: [dividend, divisor]
-        div_dict = {
-            'capitalization_usd':['capitalization', 'usd_pln'],
-            'relative_strength_6m':['price_change_6m', 'wig_6m'],
-            'price_earnings_net_earnings':['price_earnings', 'net_earnings'],
-            'roce':['ebit', 'core_capital'],
-            'net_debt_ebit':['net_debt', 'ebit'],
-            'current_assets_short_term_liabilities':['current_assets', 'short_term_liabilities'],
-            'long_term_liabilities_net_working_capital':[
-                'long_term_liabilities', 'net_working_capital'
-            ]
-        }
-
-        # Ranking variables
-        # Key is new variable name
-        # Value is variable on which the ranking is based
-
-        # Ascending rank dict:
-        asc_dict = {
-            'rank_ev_ebit':'ev_ebit',
-            'rank_price_sales_revenues':'price_sales_revenues',
-            'rank_price_earnings':'price_earnings'
-        }
-
-        # Descending rank dict:
-        desc_dict = {
-            'rank_roic':'roic',
-            'rank_relative_strength_6m':'relative_strength_6m',
-            'rank_ebit_yy':'ebit_yy'
-        }
-
-        # Capitalization
-        data_frame['capitalization'] = data_frame.apply(
-            lambda row: row.number_of_shares * row.price,
-            axis=1
-        )
-
-        # Division of various features
-        for key, value in div_dict.items():
-            dividend_index = data_frame.columns.get_loc(value[0])
-            divisor_index = data_frame.columns.get_loc(value[1])
-            division = []
-
-            # Yes, I know it's anti-pattern - but it's needed for proper division
-            for index, _ in data_frame.iterrows():
-                dividend = data_frame.iloc[index, dividend_index]
-                divisor = data_frame.iloc[index, divisor_index]
-                if not np.isnan(dividend):
-                    if divisor == 0 and dividend != 0:
-                        division.append(
-                            dividend / 10 ** -(int(math.log10(abs(dividend))) + 1)
-                        )
-                    if divisor == 0 and dividend == 0:
-                        division.append(0)
-                    division.append(dividend / divisor)
-                division.append(math.nan)
-
-            data_frame[key] = pd.Series(division)
-
-        # Ascending rankings
-        for key, value in asc_dict.items():
-            data_frame[key] = data_frame.groupby('quarter')[value].rank(method='dense')
-
-        # Descending rankings
-        for key, value in desc_dict.items():
-            data_frame[key] = data_frame.groupby('quarter')[value].rank(
-                method='dense',
-                ascending=False
-            )
-
-        # Greenblatt's ranking
-        data_frame['greenblatt_rank'] = data_frame.apply(
-            lambda row: (row.rank_ev_ebit + row.rank_roic) / 2,
-            axis=1
-        )
-        data_frame['greenblatt_rank'] = data_frame.groupby('quarter')['greenblatt_rank'].rank(
-            method='dense',
-            ascending=False
-        )
-
-        # Average P/E ratio
-        avg_price_earnings = pd.DataFrame(data_frame.groupby('quarter')['price_earnings'].mean())
-        avg_price_earnings = avg_price_earnings.rename(
-            columns={'price_earnings':'avg_price_earnings'}
-        )
-
-        data_frame = pd.merge(data_frame, avg_price_earnings, left_on='quarter', right_index=True)
-
-        return data_frame
@@ -0,0 +1,275 @@
+"""The module finding peer groups of companies and peer-relative features."""
+
+import pickle
+import numpy as np
+
+# Fundamental variables describing company (peers are companies with similar values)
+# Key is variable, value is True if variable should be log-scaled (size variables)
+PEER_FEATURES = {
+    'capitalization_usd':True,
+    'sales_revenues':True,
+    'total_assets':True,
+    'ebit_margin':False,
+    'net_debt_ebitda':False,
+    'current_liquidity':False,
+    'total_debt':False
+}
+
+# Ratios compared against peers
+# Key is variable, value is True if lower value is better
+PEER_RATIOS = {
+    'ev_ebit':True,
+    'price_earnings':True,
+    'roic':False
+}
+
+def standardize(raw, mean, std):
+    """Function standardizing fundamental vectors."""
+    # Missing values are set to mean (i.e. 0 after standardization)
+
+    matrix = (raw - mean) / std
+    matrix[np.isnan(matrix)] = 0
+
+    return matrix
+
+def nearest_neighbours(matrix, k, rows=None, block_size=1024):
+    """Function looking for k nearest neighbours of rows in matrix."""
+    # Distances are euclidean, calculated in blocks of rows:
+    # |a - b|^2 = |a|^2 + |b|^2 - 2ab, so each block is single matrix multiplication.
+    # Row is never its own neighbour.
+    # Output are arrays (len(rows), k) with positions of neighbours and distances,
+    # sorted from the nearest one.
+
+    if rows is None:
+        rows = np.arange(len(matrix))
+    k = min(k, len(matrix) - 1)
+
+    neighbours = np.empty((len(rows), max(k, 0)), dtype=np.int64)
+    distances = np.empty((len(rows), max(k, 0)))
+    if k <= 0:
+        return neighbours, distances
+
+    squares = (matrix ** 2).sum(axis=1)
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        dist = squares[block][:, None] + squares[None, :] - 2 * matrix[block] @ matrix.T
+        dist[np.arange(len(block)), block] = np.inf
+
+        nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        nearest_dist = np.take_along_axis(dist, nearest, axis=1)
+        order = np.argsort(nearest_dist, axis=1, kind='stable')
+
+        neighbours[start:start + len(block)] = np.take_along_axis(nearest, order, axis=1)
+        distances[start:start + len(block)] = np.maximum(
+            np.take_along_axis(nearest_dist, order, axis=1), 0
+        )
+
+    return neighbours, distances
+
+class PeerIndex():
+    """Nearest neighbours index of companies built for each quarter"""
+    # Index of each quarter is cached. When the quarter is requested again and only a few
+    # companies changed (at most rebuild_share of them), the cached index is updated:
+    # standardization is kept and neighbours are searched again only for rows
+    # which could be affected by the change.
+
+    def __init__(self, features=None, k=10, block_size=1024, rebuild_share=0.1):
+        self.features = features or PEER_FEATURES
+        self.k = k
+        self.block_size = block_size
+        self.rebuild_share = rebuild_share
+        self.cache = {}
+
+    def signature(self):
+        """Function returning description of fundamental variables used by index."""
+
+        return tuple(self.features.items())
+
+    def vectors(self, data_frame):
+        """Function returning raw fundamental vectors of data frame rows."""
+
+        raw = np.full((len(data_frame), len(self.features)), np.nan)
+        for i, (feature, log_scale) in enumerate(self.features.items()):
+            if feature in data_frame.columns:
+                values = data_frame[feature].to_numpy(dtype=float)
+                raw[:, i] = np.sign(values) * np.log1p(np.abs(values)) if log_scale else values
+
+        # Infinite values (e.g. division by 0) are treated as missing
+        raw[np.isinf(raw)] = np.nan
+
+        return raw
+
+    def build(self, codes, raw):
+        """Function building index of quarter from scratch."""
+
+        with np.errstate(invalid='ignore'):
+            counts = (~np.isnan(raw)).sum(axis=0)
+            mean = np.where(counts > 0, np.nansum(raw, axis=0) / np.maximum(counts, 1), 0)
+            std = np.sqrt(
+                np.nansum((raw - mean) ** 2, axis=0) / np.maximum(counts, 1)
+            )
+        std[(std == 0) | np.isnan(std)] = 1
+
+        matrix = standardize(raw, mean, std)
+        neighbours, distances = nearest_neighbours(matrix, self.k, block_size=self.block_size)
+
+        return {
+            'features':self.signature(),
+            'codes':codes,
+            'raw':raw,
+            'mean':mean,
+            'std':std,
+            'matrix':matrix,
+            'neighbours':neighbours,
+            'distances':distances
+        }
+
+    def update(self, cached, codes, raw):
+        """Function updating cached index of quarter with changed companies."""
+        # Returns None if too many companies changed and index should be rebuilt
+
+        # Index built with other fundamental variables or k is rebuilt
+        k = min(self.k, len(codes) - 1)
+        if (
+            cached.get('features') != self.signature()
+            or cached['neighbours'].shape[1] != max(k, 0)
+        ):
+            return None
+
+        old_positions = {code:i for i, code in enumerate(cached['codes'])}
+        position_map = np.full(len(cached['codes']), -1, dtype=np.int64)
+        old_rows = np.array([old_positions.get(code, -1) for code in codes], dtype=np.int64)
+        known = old_rows >= 0
+        position_map[old_rows[known]] = np.flatnonzero(known)
+
+        # Changed rows - new companies or companies with different fundamentals
+        same = np.zeros(len(codes), dtype=bool)
+        old_raw = cached['raw'][old_rows[known]]
+        same[known] = (
+            (old_raw == raw[known]) | (np.isnan(old_raw) & np.isnan(raw[known]))
+        ).all(axis=1)
+        changed = np.flatnonzero(~same)
+        removed = len(cached['codes']) - known.sum()
+
+        if len(changed) + removed > self.rebuild_share * len(codes):
+            return None
+        if not len(changed) and not removed:
+            # Only order of companies could change
+            neighbours = position_map[cached['neighbours'][old_rows]]
+            return dict(
+                cached, codes=codes, raw=raw, matrix=cached['matrix'][old_rows],
+                neighbours=neighbours, distances=cached['distances'][old_rows]
+            )
+
+        matrix = standardize(raw, cached['mean'], cached['std'])
+        neighbours = np.zeros((len(codes), max(k, 0)), dtype=np.int64)
+        distances = np.full((len(codes), max(k, 0)), np.inf)
+
+        # Unchanged rows keep their neighbours
+        keep = np.flatnonzero(same)
+        neighbours[keep] = position_map[cached['neighbours'][old_rows[keep]]]
+        distances[keep] = cached['distances'][old_rows[keep]]
+
+        # Affected rows:
+        # - changed rows,
+        # - rows with removed or changed company among neighbours,
+        # - rows to which some changed company is now closer than the furthest neighbour.
+        affected = np.zeros(len(codes), dtype=bool)
+        affected[changed] = True
+        if k > 0:
+            changed_mask = np.zeros(len(codes), dtype=bool)
+            changed_mask[changed] = True
+            affected |= (neighbours < 0).any(axis=1)
+            affected |= changed_mask[np.maximum(neighbours, 0)].any(axis=1)
+            if len(changed):
+                to_changed = (
+                    (matrix ** 2).sum(axis=1)[:, None]
+                    + (matrix[changed] ** 2).sum(axis=1)[None, :]
+                    - 2 * matrix @ matrix[changed].T
+                )
+                to_changed[changed, np.arange(len(changed))] = np.inf
+                affected |= (to_changed < distances[:, -1][:, None]).any(axis=1)
+
+        rows = np.flatnonzero(affected)
+        neighbours[rows], distances[rows] = nearest_neighbours(
+            matrix, self.k, rows=rows, block_size=self.block_size
+        )
+
+        return dict(
+            cached, codes=codes, raw=raw, matrix=matrix,
+            neighbours=neighbours, distances=distances
+        )
+
+    def quarter_peers(self, quarter, codes, raw):
+        """Function returning neighbours of quarter's companies."""
+        # Output is array (len(codes), k) with positions of peers in codes
+
+        codes = np.asarray(codes)
+        index = None
+        if quarter in self.cache:
+            index = self.update(self.cache[quarter], codes, raw)
+        if index is None:
+            index = self.build(codes, raw)
+        self.cache[quarter] = index
+
+        return index['neighbours']
+
+    def peer_features(self, data_frame, ratios=None):
+        """Function adding peer-relative z-scores and ranks of ratios."""
+        # For each ratio two variables are added:
+        # peer_z_<ratio> - z-score of company's value against values of its peers,
+        # peer_rank_<ratio> - rank of company in group of itself and its peers (1 is the best).
+
+        ratios = ratios or PEER_RATIOS
+        ratios = {ratio:asc for ratio, asc in ratios.items() if ratio in data_frame.columns}
+
+        raw = self.vectors(data_frame)
+        codes = data_frame['company_code'].to_numpy()
+        values = {ratio:data_frame[ratio].to_numpy(dtype=float) for ratio in ratios}
+        results = {}
+        for ratio in ratios:
+            results['peer_z_' + ratio] = np.full(len(data_frame), np.nan)
+            results['peer_rank_' + ratio] = np.full(len(data_frame), np.nan)
+
+        for quarter, positions in data_frame.groupby('quarter').indices.items():
+            neighbours = self.quarter_peers(quarter, codes[positions], raw[positions])
+            if not neighbours.shape[1]:
+                continue
+
+            for ratio, ascending in ratios.items():
+                own = values[ratio][positions]
+                own[np.isinf(own)] = np.nan
+                peers = own[neighbours]
+                valid = ~np.isnan(peers)
+
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    counts = valid.sum(axis=1)
+                    mean = np.where(valid, peers, 0).sum(axis=1) / counts
+                    std = np.sqrt(
+                        np.where(valid, (peers - mean[:, None]) ** 2, 0).sum(axis=1) / counts
+                    )
+                    z_score = np.where(std > 0, (own - mean) / std, np.nan)
+
+                better = peers < own[:, None] if ascending else peers > own[:, None]
+                rank = 1 + (better & valid).sum(axis=1).astype(float)
+                rank[np.isnan(own)] = np.nan
+
+                results['peer_z_' + ratio][positions] = z_score
+                results['peer_rank_' + ratio][positions] = rank
+
+        for column, result in results.items():
+            data_frame[column] = result
+
+        return data_frame
+
+    def save(self, path):
+        """Function saving cached indexes to file."""
+
+        with open(path, 'wb') as file:
+            pickle.dump(self.cache, file)
+
+    def load(self, path):
+        """Function loading cached indexes from file."""
+
+        with open(path, 'rb') as file:
+            self.cache = pickle.load(file)
@@ -0,0 +1,164 @@
+"""The module storing daily prices and resampling them to quarters."""
+
+import numpy as np
+import pandas as pd
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+
+def date_to_int(dates):
+    """Function converting dates to int32 numbers."""
+    # Input format: dd.mm.yyyy (list or array of strings)
+    # Output format: yyyymmdd (int32 array), e.g. '31.03.2020' -> 20200331
+    # Invalid or empty dates are returned as -1
+
+    dates = pd.to_datetime(
+        pd.Series(dates, dtype=object).astype(str).str.strip(), format='%d.%m.%Y', errors='coerce'
+    )
+
+    return (
+        dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day
+    ).fillna(-1).to_numpy(dtype=np.int32)
+
+def quarter_ids(dates):
+    """Function converting yyyymmdd dates to quarter numbers."""
+    # Quarter number is counted from year 0, e.g. 2020/Q1 -> 8080
+    # Invalid dates (-1) are returned as -1
+
+    dates = np.asarray(dates, dtype=np.int64)
+
+    return np.where(dates >= 0, dates // 10000 * 4 + (dates // 100 % 100 - 1) // 3, -1)
+
+def quarter_names(ids):
+    """Function converting quarter numbers to yyyy/QQ format."""
+
+    ids = np.asarray(ids, dtype=np.int64)
+
+    return (
+        pd.Series(ids // 4).astype(str) + '/Q' + pd.Series(ids % 4 + 1).astype(str)
+    ).to_numpy()
+
+def quarterly_prices(dates, high, low, close):
+    """Function resampling daily prices to quarters."""
+    # Input are arrays of daily data sorted by date (dates in yyyymmdd format).
+    # For each quarter max of highs, min of lows and last close is calculated.
+    # Additionally forward window targets are added:
+    # max_price_change_y - % change between max price in the next 4 quarters and close,
+    # min_price_change_y - % change between min price in the next 4 quarters and close.
+    # E.g. for Q1 2020 the window is [Q2 2020, Q3 2020, Q4 2020, Q1 2021].
+
+    columns = [
+        'price_max_q', 'price_min_q', 'price_close_q',
+        'max_price_change_y', 'min_price_change_y'
+    ]
+    if not len(dates):
+        return pd.DataFrame(columns=columns)
+
+    ids = quarter_ids(dates)
+
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    ends = np.r_[starts[1:], len(ids)]
+
+    # Full range of quarters - quarters without quotes are NaN
+    full_ids = np.arange(ids[0], ids[-1] + 1)
+    positions = ids[starts] - ids[0]
+
+    def spread(values):
+        """Subfunction placing quarterly values in full range of quarters."""
+
+        result = np.full(len(full_ids), np.nan)
+        result[positions] = values
+        return result
+
+    # NaNs in daily data are ignored by fmax/fmin
+    q_max = spread(np.fmax.reduceat(np.asarray(high, dtype=np.float64), starts))
+    q_min = spread(np.fmin.reduceat(np.asarray(low, dtype=np.float64), starts))
+    q_close = spread(np.asarray(close, dtype=np.float64)[ends - 1])
+
+    # Forward window - max/min of 4 following quarters
+    fwd_max = np.full(len(full_ids), np.nan)
+    fwd_min = np.full(len(full_ids), np.nan)
+    for step in range(1, 5):
+        fwd_max[:-step] = np.fmax(fwd_max[:-step], q_max[step:])
+        fwd_min[:-step] = np.fmin(fwd_min[:-step], q_min[step:])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        abs_close = np.where(q_close == 0, np.nan, np.abs(q_close))
+        max_change = (fwd_max - q_close) / abs_close
+        min_change = (fwd_min - q_close) / abs_close
+
+    data_frame = pd.DataFrame(
+        dict(zip(columns, [q_max, q_min, q_close, max_change, min_change])),
+        index=quarter_names(full_ids)
+    )
+
+    return data_frame[~np.isnan(q_close)]
+
+class PriceStore():
+    """Daily OHLC prices of companies"""
+    # Each company is stored as separate chunk of columns:
+    # dates as int32 (yyyymmdd) and prices as float32, sorted by date.
+    # Whole store is saved in single compressed .npz file.
+
+    def __init__(self):
+        self.data = {}
+
+    def add(self, code, dates, open_prices, high, low, close):
+        """Function adding daily prices of company."""
+        # Dates in dd.mm.yyyy or yyyymmdd format
+        # Rows with invalid dates and duplicated days are dropped
+
+        if len(dates) and isinstance(dates[0], str):
+            dates = date_to_int(dates)
+        dates = np.asarray(dates, dtype=np.int32)
+
+        order = np.argsort(dates, kind='stable')
+        order = order[dates[order] >= 0]
+        dates = dates[order]
+        unique = np.r_[True, dates[1:] != dates[:-1]] if len(dates) else np.empty(0, bool)
+        chunk = {'date':dates[unique]}
+        for field, values in zip(PRICE_FIELDS, [open_prices, high, low, close]):
+            chunk[field] = np.asarray(values, dtype=np.float32)[order][unique]
+
+        self.data[code] = chunk
+
+    def save(self, path):
+        """Function saving store to .npz file."""
+
+        np.savez_compressed(path, **{
+            code + '.' + field:values
+            for code, chunk in self.data.items() for field, values in chunk.items()
+        })
+
+    @classmethod
+    def load(cls, path):
+        """Function loading store from .npz file."""
+
+        store = cls()
+        with np.load(path) as npz:
+            for key in npz.files:
+                code, _, field = key.rpartition('.')
+                store.data.setdefault(code, {})[field] = npz[key]
+
+        return store
+
+    def quarterly(self, code):
+        """Function resampling company's daily prices to quarters."""
+
+        chunk = self.data[code]
+
+        return quarterly_prices(chunk['date'], chunk['high'], chunk['low'], chunk['close'])
+
+    def quarterly_all(self):
+        """Function resampling daily prices of all companies to quarters."""
+        # Output is long data frame with quarter and company_code columns
+
+        frames = []
+        for code in self.data:
+            data_frame = self.quarterly(code)
+            data_frame.insert(0, 'company_code', code)
+            frames.append(data_frame)
+
+        if not frames:
+            return pd.DataFrame(columns=['quarter', 'company_code'])
+
+        return pd.concat(frames).rename_axis('quarter').reset_index()
@@ -0,0 +1,283 @@
+"""The module serving queries on the final dataset."""
+
+import glob
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+
+class DatasetIndex():
+    """Final dataset with indexes for fast lookups"""
+    # Rows are sorted by company and quarter, so time series of given company
+    # is a contiguous slice of the data frame.
+    # Indexes are built once and never modified - on reload the whole object is replaced.
+
+    def __init__(self, data_frame, path=''):
+        self.path = path
+        self.data_frame = data_frame.sort_values(
+            ['company_code', 'quarter']
+        ).reset_index(drop=True)
+
+        companies = self.data_frame['company_code'].to_numpy()
+        quarters = self.data_frame['quarter'].to_numpy()
+
+        # (company, quarter) index
+        self.row_index = dict(zip(zip(companies, quarters), range(len(companies))))
+
+        # Company index - start and end of company's slice
+        self.company_index = {}
+        if len(companies):
+            starts = np.flatnonzero(np.r_[True, companies[1:] != companies[:-1]])
+            ends = np.r_[starts[1:], len(companies)]
+            self.company_index = {
+                companies[start]:(start, end) for start, end in zip(starts, ends)
+            }
+
+        # Quarter index - positions of all rows from given quarter
+        self.quarter_index = {
+            quarter:np.asarray(positions) for quarter, positions in
+            self.data_frame.groupby('quarter').indices.items()
+        }
+
+        # Sorted indexes - positions of rows from given quarter sorted by column
+        # Rank columns are sorted eagerly, other columns on first use
+        self.columns = {}
+        self.sorted_index = {}
+        for column in self.data_frame.columns:
+            if column.startswith('rank_') or column == 'greenblatt_rank':
+                self.sorted_positions('', column)
+
+    def values(self, column):
+        """Function returning column as float numpy array."""
+
+        if column not in self.columns:
+            self.columns[column] = pd.to_numeric(
+                self.data_frame[column], errors='coerce'
+            ).to_numpy(dtype=float)
+
+        return self.columns[column]
+
+    def sorted_positions(self, quarter, column):
+        """Function returning positions from quarter sorted ascending by column."""
+        # Rows with missing values are left out of the index.
+        # Indexes for all quarters are built at once, so quarter only picks the result.
+
+        if column not in self.sorted_index:
+            values = self.values(column)
+            column_index = {}
+            for key, positions in self.quarter_index.items():
+                positions = positions[~np.isnan(values[positions])]
+                column_index[key] = positions[np.argsort(values[positions], kind='stable')]
+            self.sorted_index[column] = column_index
+
+        return self.sorted_index[column].get(quarter, np.empty(0, dtype=int))
+
+class DatasetQuery():
+    """Query service keeping the latest final dataset in memory"""
+    # Dataset is reloaded when a newer file appears in datasets folder.
+    # Folder is watched by background thread every check_interval seconds,
+    # new index is built there and swapped in, so queries never wait for the reload.
+
+    def __init__(self, pattern='data\\full_datasets\\dataset_*.csv', check_interval=5):
+        self.pattern = pattern
+        self.check_interval = check_interval
+        self.index = DatasetIndex(pd.DataFrame(columns=['company_code', 'quarter']))
+        self.version = None
+        self.pending = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.refresh()
+
+        self.watcher = threading.Thread(target=self.watch, daemon=True)
+        self.watcher.start()
+
+    def refresh(self, settle=False):
+        """Function reloading dataset if a new version is available."""
+        # With settle new version is loaded only if it has not changed since
+        # the previous check (i.e. file is not being written any more)
+
+        with self.lock:
+            files = glob.glob(self.pattern)
+            if not files:
+                return False
+
+            path = max(files, key = os.path.getctime)
+            version = (path, os.path.getmtime(path), os.path.getsize(path))
+            if version == self.version:
+                return False
+            if settle and version != self.pending:
+                self.pending = version
+                return False
+
+            # Building new index aside, queries use the old one until it is ready
+            self.index = DatasetIndex(pd.read_csv(path), path)
+            self.version = version
+
+        print(f'Loaded dataset {path}')
+
+        return True
+
+    def watch(self):
+        """Function checking for new dataset until service is stopped."""
+
+        while not self.stopped.wait(self.check_interval):
+            try:
+                self.refresh(settle=True)
+            except (OSError, ValueError) as error:
+                # E.g. file still being written - next check would try again
+                print(f'Reloading dataset failed: {error}')
+
+    def stop(self):
+        """Function stopping background watcher."""
+
+        self.stopped.set()
+
+    def top(self, quarter, column, n=10, ascending=True, filters=None, columns=None):
+        """Function returning top n companies in quarter by column."""
+        # filters is dict: {column: (min, max)}, None means no bound
+        # E.g. {'capitalization_usd': (50000000, None)}
+
+        index = self.index
+
+        positions = index.sorted_positions(quarter, column)
+        if not ascending:
+            positions = positions[::-1]
+
+        mask = np.ones(len(positions), dtype=bool)
+        for filter_column, (lower, upper) in (filters or {}).items():
+            values = index.values(filter_column)[positions]
+            if lower is not None:
+                mask &= values >= lower
+            if upper is not None:
+                mask &= values <= upper
+
+        return self.rows(index, positions[mask][:n], columns)
+
+    def lookup(self, company, quarter, columns=None):
+        """Function returning single row for company and quarter."""
+
+        index = self.index
+
+        position = index.row_index.get((company, quarter))
+        positions = [] if position is None else [position]
+
+        return self.rows(index, positions, columns)
+
+    def series(self, company, start=None, end=None, columns=None):
+        """Function returning all quarters of company between start and end."""
+        # Quarters in format yyyy/QQ sort properly as strings
+
+        index = self.index
+
+        first, last = index.company_index.get(company, (0, 0))
+        quarters = index.data_frame['quarter'].to_numpy()[first:last]
+        offset = first
+        if start is not None:
+            first = offset + int(np.searchsorted(quarters, start, side='left'))
+        if end is not None:
+            last = offset + int(np.searchsorted(quarters, end, side='right'))
+
+        return self.rows(index, np.arange(first, max(first, last)), columns)
+
+    @staticmethod
+    def rows(index, positions, columns=None):
+        """Function returning rows from index as data frame."""
+
+        data_frame = index.data_frame.iloc[positions]
+        if columns:
+            data_frame = data_frame[
+                ['company_code', 'quarter'] + [
+                    column for column in columns if column not in ('company_code', 'quarter')
+                ]
+            ]
+
+        return data_frame
+
+def serve(query, host='127.0.0.1', port=8000):
+    """Function running HTTP endpoint for query service."""
+    # Endpoints (all answers are JSON):
+    # /top?quarter=2022/Q3&column=greenblatt_rank&n=10&min_capitalization_usd=50000000
+    # /lookup?company=CDR&quarter=2022/Q3
+    # /series?company=CDR&start=2020/Q1&end=2022/Q4
+    # /status
+    # Optional parameters: columns (comma separated), ascending (0/1),
+    # min_<column> and max_<column> for filtering top screens
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        """Handler of HTTP requests"""
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            """Function answering GET requests."""
+
+            url = urlparse(self.path)
+            params = {key:value[-1] for key, value in parse_qs(url.query).items()}
+            columns = params['columns'].split(',') if params.get('columns') else None
+
+            try:
+                if url.path == '/top':
+                    filters = {}
+                    for key, value in params.items():
+                        if key[:4] in ('min_', 'max_'):
+                            bounds = filters.get(key[4:], (None, None))
+                            if key[:4] == 'min_':
+                                filters[key[4:]] = (float(value), bounds[1])
+                            else:
+                                filters[key[4:]] = (bounds[0], float(value))
+                    result = query.top(
+                        params['quarter'], params['column'],
+                        n=int(params.get('n', 10)),
+                        ascending=params.get('ascending', '1') != '0',
+                        filters=filters, columns=columns
+                    )
+                elif url.path == '/lookup':
+                    result = query.lookup(params['company'], params['quarter'], columns)
+                elif url.path == '/series':
+                    result = query.series(
+                        params['company'], params.get('start'), params.get('end'), columns
+                    )
+                elif url.path == '/status':
+                    self.answer(200, json.dumps({
+                        'path':query.index.path,
+                        'rows':len(query.index.data_frame),
+                        'companies':len(query.index.company_index),
+                        'quarters':len(query.index.quarter_index)
+                    }))
+                    return
+                else:
+                    self.answer(404, json.dumps({'error':'unknown endpoint'}))
+                    return
+            except KeyError as error:
+                self.answer(400, json.dumps({'error':f'missing parameter or column {error}'}))
+                return
+            except ValueError as error:
+                self.answer(400, json.dumps({'error':str(error)}))
+                return
+
+            self.answer(200, result.to_json(orient='records'))
+
+        def answer(self, status, body):
+            """Function sending JSON answer."""
+
+            body = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            """Function silencing default request logging."""
+
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    print(f'Serving dataset queries on http://{host}:{port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        query.stop()
+
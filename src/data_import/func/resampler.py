@@ -0,0 +1,77 @@
+"""The module resampling daily and monthly series to quarters."""
+
+import numpy as np
+import pandas as pd
+from func.prices import date_to_int, quarter_ids, quarter_names
+
+# Available aggregation rules:
+# first - first observation in quarter,
+# last - last observation in quarter, only if it comes from quarter-end month
+#   (March/June/September/December), otherwise quarter is incomplete and value is NaN,
+# mean/sum/max/min - aggregation of all observations in quarter,
+# pct - change of last observation against last observation in previous quarter.
+RULES = ('first', 'last', 'mean', 'sum', 'max', 'min', 'pct')
+
+def default_rules(name):
+    """Function returning default aggregation rules of series."""
+    # Monthly series (_m suffix) keep also quarterly mean, so other months are not lost
+    # Other series (quarterly, daily indices) keep only the last observation
+
+    if name.endswith('_m'):
+        return ('last', 'mean')
+
+    return ('last',)
+
+def resample_quarterly(dates, values, name, rules=None):
+    """Function aggregating series to quarters."""
+    # Input are dates (dd.mm.yyyy) and values (numbers or strings) in any order.
+    # All rules are calculated in one pass of groupby.
+    # Output columns are: name for 'last' rule and name_<rule> for other rules.
+
+    rules = tuple(rules or default_rules(name))
+    if any(rule not in RULES for rule in rules):
+        raise ValueError(f'Unknown aggregation rule in {rules}!')
+
+    # pct is calculated from last observations
+    agg_rules = [rule for rule in rules if rule != 'pct']
+    if 'pct' in rules and 'last' not in agg_rules:
+        agg_rules.append('last')
+
+    days = date_to_int(dates)
+    values = pd.to_numeric(
+        pd.Series(values, dtype=object).astype(str).str.replace(' ', ''),
+        errors='coerce'
+    ).to_numpy(dtype=float)
+
+    # Observations have to be in chronological order for first/last rules
+    order = np.argsort(days, kind='stable')
+    series_df = pd.DataFrame({
+        'quarter':quarter_ids(days[order]),
+        'value':values[order],
+        'end_month':days[order] // 100 % 100 % 3 == 0
+    })
+    series_df = series_df[(series_df['quarter'] >= 0) & ~np.isnan(series_df['value'])]
+
+    columns = [name if rule == 'last' else name + '_' + rule for rule in rules]
+    if series_df.empty:
+        return pd.DataFrame(columns=columns)
+
+    grouped = series_df.groupby('quarter')
+    quarter_df = grouped['value'].agg(agg_rules)
+
+    # Quarters without data from quarter-end month have no last value
+    if 'last' in agg_rules:
+        quarter_df.loc[~grouped['end_month'].last(), 'last'] = np.nan
+
+    if 'pct' in rules:
+        # Missing quarters are added, so change is always against previous quarter
+        last = quarter_df['last'].reindex(
+            np.arange(quarter_df.index.min(), quarter_df.index.max() + 1)
+        )
+        quarter_df['pct'] = last.pct_change(fill_method=None).reindex(quarter_df.index)
+
+    quarter_df = quarter_df[list(rules)]
+    quarter_df.columns = columns
+    quarter_df.index = quarter_names(quarter_df.index)
+
+    return quarter_df
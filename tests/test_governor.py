@@ -0,0 +1,149 @@
+"""Tests of request governor."""
+
+from email.utils import formatdate
+import os
+import sys
+import threading
+import time
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'data_import'))
+
+from func.governor import RequestGovernor  # pylint: disable=wrong-import-position
+
+def response(status_code, retry_after=None):
+    """Function creating response with given status."""
+
+    result = requests.Response()
+    result.status_code = status_code
+    result.url = 'https://www.biznesradar.pl/test'
+    if retry_after is not None:
+        result.headers['Retry-After'] = retry_after
+
+    return result
+
+class StubSession():
+    """Session returning (or raising) prepared answers in order"""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = 0
+
+    def get(self, url, **kwargs):  # pylint: disable=unused-argument
+        """Function returning next prepared answer."""
+
+        self.calls += 1
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+
+        return answer
+
+def governor(answers, **kwargs):
+    """Function creating governor with stubbed session and no waiting."""
+
+    result = RequestGovernor(rate=1000, burst=10, backoff=0, **kwargs)
+    result.session = StubSession(answers)
+
+    return result
+
+def test_slot_is_released_after_unexpected_error():
+    """Unexpected error is raised and does not block next requests."""
+
+    stub = governor([requests.exceptions.ChunkedEncodingError('broken'), response(200)])
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        stub.get('https://www.biznesradar.pl/test')
+    assert stub.active == 0
+
+    # Next request would wait forever if the slot was not released
+    result = []
+    thread = threading.Thread(
+        target=lambda: result.append(stub.get('https://www.biznesradar.pl/test')), daemon=True
+    )
+    thread.start()
+    thread.join(timeout=5)
+    assert result and result[0].status_code == 200
+
+def test_too_many_requests_is_retried():
+    """429 response is retried, Retry-After pauses requests and limit is decreased."""
+
+    stub = governor([response(429, '0'), response(200)])
+    stub.limit = 4.0
+
+    assert stub.get('https://www.biznesradar.pl/test').status_code == 200
+    assert stub.session.calls == 2
+    assert stub.paused_until > 0
+    assert stub.limit < 4.0
+    assert stub.active == 0
+
+def test_error_is_raised_after_max_retries():
+    """5xx response left after the last retry is raised."""
+
+    stub = governor([response(503)] * 3, max_retries=2)
+
+    with pytest.raises(requests.HTTPError):
+        stub.get('https://www.biznesradar.pl/test')
+    assert stub.session.calls == 3
+    assert stub.active == 0
+
+def test_connection_error_is_raised_after_max_retries():
+    """Connection error left after the last retry is raised."""
+
+    stub = governor([requests.ConnectionError('down')] * 2, max_retries=1)
+
+    with pytest.raises(requests.ConnectionError):
+        stub.get('https://www.biznesradar.pl/test')
+    assert stub.session.calls == 2
+    assert stub.active == 0
+
+def test_not_found_is_returned():
+    """Responses other than 429/5xx are returned without retrying."""
+
+    stub = governor([response(404)])
+
+    assert stub.get('https://www.biznesradar.pl/test').status_code == 404
+    assert stub.session.calls == 1
+
+def test_delay_with_retry_after():
+    """Retry-After is read as seconds or HTTP date, otherwise backoff is used."""
+
+    stub = RequestGovernor(backoff=1.0, max_backoff=60.0)
+
+    assert stub.delay(0, response(429, '7')) == 7
+    assert stub.delay(0, response(429, '600')) == 60
+    assert 25 < stub.delay(0, response(429, formatdate(time.time() + 30, usegmt=True))) <= 30
+    assert stub.delay(0, response(429, formatdate(time.time() - 30, usegmt=True))) == 0
+    assert 0 <= stub.delay(3, response(429, 'soon')) <= 8
+    assert 0 <= stub.delay(2) <= 4
+
+def test_limit_changes():
+    """Limit grows after fast responses and halves after slow or overloaded ones."""
+
+    stub = RequestGovernor(rate=1000, burst=10, max_concurrency=4, target_latency=1.0)
+
+    for _ in range(20):
+        stub.acquire()
+        stub.release(0.1)
+    assert stub.limit == 4
+
+    stub.acquire()
+    stub.release(5.0)
+    assert stub.limit == 2
+
+    stub.acquire()
+    stub.release(0.1, overloaded=True)
+    assert stub.limit == 1
+
+def test_token_bucket_limits_rate():
+    """Requests over burst wait for new tokens."""
+
+    stub = RequestGovernor(rate=20, burst=1, max_concurrency=1)
+
+    start = time.monotonic()
+    for _ in range(3):
+        stub.acquire()
+        stub.release()
+
+    assert time.monotonic() - start >= 0.09
@@ -0,0 +1,59 @@
+"""Tests of peer groups index."""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'data_import'))
+
+from func.peers import (  # pylint: disable=wrong-import-position
+    PEER_FEATURES, PeerIndex, nearest_neighbours, standardize
+)
+
+def quarter_df(size=500, seed=0):
+    """Function creating random quarter of companies' data."""
+
+    rng = np.random.default_rng(seed)
+    data_frame = pd.DataFrame({
+        'company_code':['C' + str(i) for i in range(size)],
+        'quarter':'2022/Q3'
+    })
+    for column in list(PEER_FEATURES) + ['ev_ebit', 'price_earnings', 'roic']:
+        data_frame[column] = rng.normal(size=size) * 100
+
+    return data_frame
+
+def test_incremental_update_matches_rebuild():
+    """Updated index has the same neighbours as index built from scratch."""
+
+    data_frame = quarter_df()
+    peer_index = PeerIndex(k=10)
+    peer_index.peer_features(data_frame.copy())
+
+    # A few companies removed, a few changed and order shuffled
+    changed_df = data_frame.drop(index=range(10, 13)).sample(frac=1, random_state=1)
+    changed_df = changed_df.reset_index(drop=True)
+    changed_df.loc[:9, 'ebit_margin'] = np.random.default_rng(2).normal(size=10) * 100
+    peer_index.peer_features(changed_df.copy())
+
+    # Rebuild with the same standardization (it is kept by incremental update)
+    cached = peer_index.cache['2022/Q3']
+    expected, _ = nearest_neighbours(standardize(cached['raw'], cached['mean'], cached['std']), 10)
+
+    assert list(cached['codes']) == list(changed_df['company_code'])
+    assert (np.sort(expected, axis=1) == np.sort(cached['neighbours'], axis=1)).all()
+
+def test_index_is_rebuilt_for_other_features():
+    """Cached index built with other fundamental variables is not updated."""
+
+    data_frame = quarter_df()
+    peer_index = PeerIndex(k=5)
+    peer_index.peer_features(data_frame.copy())
+
+    other_index = PeerIndex(features={'capitalization_usd':True, 'roic':False}, k=5)
+    other_index.cache = peer_index.cache
+    result = other_index.peer_features(data_frame.copy())
+
+    assert other_index.cache['2022/Q3']['raw'].shape[1] == 2
+    assert result['peer_rank_roic'].between(1, 6).all()
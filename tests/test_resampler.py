@@ -0,0 +1,39 @@
+"""Tests of resampling series to quarters."""
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'data_import'))
+
+from func.resampler import resample_quarterly  # pylint: disable=wrong-import-position
+
+def test_rules_of_monthly_series():
+    """All rules are calculated and incomplete quarter has no last value."""
+
+    # Dates are in website's order (the newest first), September 2020 is not published yet
+    dates = ['31.08.2020', '31.07.2020', '30.06.2020', '31.05.2020', '30.04.2020', 'xx']
+    values = ['8', '7', '6', '5', '1 000', '1']
+
+    result = resample_quarterly(dates, values, 'inflation_mm_m', ('last', 'mean', 'max', 'pct'))
+
+    assert list(result.columns) == [
+        'inflation_mm_m', 'inflation_mm_m_mean', 'inflation_mm_m_max', 'inflation_mm_m_pct'
+    ]
+    assert list(result.index) == ['2020/Q2', '2020/Q3']
+    assert result.loc['2020/Q2', 'inflation_mm_m'] == 6
+    assert result.loc['2020/Q2', 'inflation_mm_m_max'] == 1000
+    assert np.isnan(result.loc['2020/Q3', 'inflation_mm_m'])
+    assert result.loc['2020/Q3', 'inflation_mm_m_mean'] == 7.5
+    assert np.isnan(result.loc['2020/Q3', 'inflation_mm_m_pct'])
+
+def test_daily_series_last_day_of_quarter():
+    """Last value of daily series comes from the last day of quarter."""
+
+    dates = ['02.01.2020', '30.03.2020', '31.03.2020', '01.04.2020']
+    values = [1, 2, 3, 4]
+
+    result = resample_quarterly(dates, values, 'wig')
+
+    assert result.loc['2020/Q1', 'wig'] == 3
+    assert np.isnan(result.loc['2020/Q2', 'wig'])